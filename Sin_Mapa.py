@@ -1,5 +1,6 @@
 import streamlit as st
 from pathlib import Path
+from busqueda import selector_sede
 
 # Configuración de la página
 st.set_page_config(
@@ -22,7 +23,7 @@ st.sidebar.header("🏢 Selecciona una sede")
 # Buscar automáticamente todos los archivos *_graficos.png
 archivos = sorted(GRAFICOS_DIR.glob("*_graficos.png"))
 sedes = [f.stem.replace("_graficos", "") for f in archivos]
-sede_seleccionada = st.sidebar.selectbox("Sede:", sedes)
+sede_seleccionada = selector_sede(sedes, "Sede:", contenedor=st.sidebar)
 
 # Mostrar logo opcional en sidebar
 if LOGO_PATH.exists():
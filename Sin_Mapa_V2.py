@@ -1,5 +1,6 @@
 import streamlit as st
 from pathlib import Path
+from busqueda import selector_sede
 
 # Configuración de la página
 st.set_page_config(
@@ -32,7 +33,7 @@ nacional_path = BASE_PATH / "Nacional.png"
 #if nacional_path.exists() and "Nacional" not in sedes:
     #sedes.insert(0, "Nacional")
 
-sede_seleccionada = st.sidebar.selectbox("Sede:", sedes)
+sede_seleccionada = selector_sede(sedes, "Sede:", contenedor=st.sidebar)
 
 # Preparar rutas
 ruta_nacional = nacional_path
@@ -4,7 +4,9 @@ import folium
 import pandas as pd
 import os
 from pathlib import Path
+from busqueda import selector_sede
 import base64
+from indice_espacial import IndiceEspacial, capa_visible, limites_desde_evento
 
 # Configuración de la página
 st.set_page_config(
@@ -20,6 +22,9 @@ COOR_FILE = BASE_PATH / "Coordenadas_Sedes.xlsx"
 GRAFICOS_DIR = BASE_PATH / "graficos_sedes"
 LOGO_PATH = BASE_PATH / "logo.png"
 
+# Enviar solo los marcadores (o clusters) de la ventana visible del mapa
+MODO_VIEWPORT = True
+
 # --- FUNCIONES AUXILIARES ---
 @st.cache_data
 def cargar_coordenadas():
@@ -41,36 +46,47 @@ def obtener_imagen_base64(ruta_imagen):
             return base64.b64encode(img_file.read()).decode()
     return ""
 
+@st.cache_resource
+def crear_indice_espacial(df):
+    """Construye (una vez) el índice espacial sobre las coordenadas."""
+    return IndiceEspacial(df)
+
 # Cargar datos de coordenadas
 df_sedes = cargar_coordenadas()
 
 # --- FUNCIÓN PARA CREAR MAPA INTERACTIVO ---
-def crear_mapa_interactivo(df):
+def crear_marcador(row, logo_base64):
+    """Crea el marcador de Folium con el popup de una sede."""
+    logo_html = (
+        f'<div style="text-align:center;"><img src="data:image/png;base64,{logo_base64}" width="80" '
+        'style="margin-bottom:10px;"></div>'
+    ) if logo_base64 else ""
+    popup_html = (
+        f'<div style="font-family: Arial; text-align:center; width:200px;">'
+        f'{logo_html}<h4 style="color:#2c3e50;">{row["NombreSede"]}</h4>'
+        '<button style="background:#3498db;border:none;color:white;padding:8px 16px;'
+        'font-size:14px;border-radius:4px;cursor:pointer;" '
+        f'onclick="window.parent.postMessage(\'{row["NombreSede"]}\', \'*\')">'
+        'Ver Gráficos</button></div>'
+    )
+    return folium.Marker(
+        location=[row['Latitud_sede'], row['Longitud_sede']],
+        popup=folium.Popup(popup_html, max_width=250),
+        tooltip=row['NombreSede'],
+        icon=folium.Icon(color="blue", icon="university", prefix="fa")
+    )
+
+def crear_mapa_interactivo(df, incluir_marcadores=True):
     """Crea un mapa de Folium con marcadores para cada sede."""
     if df.empty:
         return folium.Map(location=[-33.45, -70.67], zoom_start=5)
     centro = [df['Latitud_sede'].mean(), df['Longitud_sede'].mean()]
     mapa = folium.Map(location=centro, zoom_start=5, tiles='CartoDB Positron', control_scale=True)
+    if not incluir_marcadores:
+        return mapa
     logo_base64 = obtener_imagen_base64(LOGO_PATH) if LOGO_PATH.exists() else ""
-    for _, row in df.iterrows():
-        logo_html = (
-            f'<div style="text-align:center;"><img src="data:image/png;base64,{logo_base64}" width="80" '
-            'style="margin-bottom:10px;"></div>'
-        ) if logo_base64 else ""
-        popup_html = (
-            f'<div style="font-family: Arial; text-align:center; width:200px;">'
-            f'{logo_html}<h4 style="color:#2c3e50;">{row["NombreSede"]}</h4>'
-            '<button style="background:#3498db;border:none;color:white;padding:8px 16px;'
-            'font-size:14px;border-radius:4px;cursor:pointer;" '
-            f'onclick="window.parent.postMessage(\'{row["NombreSede"]}\', \'*\')">'
-            'Ver Gráficos</button></div>'
-        )
-        folium.Marker(
-            location=[row['Latitud_sede'], row['Longitud_sede']],
-            popup=folium.Popup(popup_html, max_width=250),
-            tooltip=row['NombreSede'],
-            icon=folium.Icon(color="blue", icon="university", prefix="fa")
-        ).add_to(mapa)
+    for _, row in df.dropna(subset=['Latitud_sede', 'Longitud_sede']).iterrows():
+        crear_marcador(row, logo_base64).add_to(mapa)
     return mapa
 
 # --- INTERFAZ DE LA APLICACIÓN ---
@@ -86,14 +102,31 @@ with col1:
     st.header("⚙️ Configuración")
     st.markdown("1. Explora el mapa\n2. Haz clic en un marcador\n3. Presiona **Ver Gráficos**")
     sedes = sorted(df_sedes['NombreSede'].unique())
-    sede_seleccionada = st.selectbox("Selecciona sede", sedes)
+    sede_seleccionada = selector_sede(sedes, "Selecciona sede")
     if LOGO_PATH.exists():
         st.image(str(LOGO_PATH), width=150)
 
 with col2:
     st.header("📍 Mapa de Sedes")
-    mapa = crear_mapa_interactivo(df_sedes)
-    evento = st_folium(mapa, width=900, height=600, returned_objects=["last_object_clicked_popup"])
+    if MODO_VIEWPORT:
+        # Solo se envían los marcadores de la última ventana visible del mapa
+        mapa = crear_mapa_interactivo(df_sedes, incluir_marcadores=False)
+        indice = crear_indice_espacial(df_sedes)
+        vista = st.session_state.get("mapa_sedes") or {}
+        logo_base64 = obtener_imagen_base64(LOGO_PATH) if LOGO_PATH.exists() else ""
+        capa = capa_visible(
+            indice,
+            limites_desde_evento(vista) or indice.limites(),
+            vista.get("zoom") or 5,
+            lambda row: crear_marcador(row, logo_base64)
+        )
+        evento = st_folium(
+            mapa, key="mapa_sedes", width=900, height=600, feature_group_to_add=capa,
+            returned_objects=["last_object_clicked_popup", "bounds", "zoom"]
+        )
+    else:
+        mapa = crear_mapa_interactivo(df_sedes)
+        evento = st_folium(mapa, width=900, height=600, returned_objects=["last_object_clicked_popup"])
     if evento and evento.get("last_object_clicked_popup"):
         sede_seleccionada = evento["last_object_clicked_popup"]
         st.experimental_rerun()
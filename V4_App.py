@@ -5,6 +5,7 @@ import pandas as pd
 import os
 from pathlib import Path
 import base64
+from indice_espacial import IndiceEspacial, capa_visible, limites_desde_evento
 
 # Configuración de la página
 st.set_page_config(
@@ -20,6 +21,9 @@ COOR_FILE = BASE_PATH / "Coordenadas_Sedes.xlsx"
 GRAFICOS_DIR = BASE_PATH / "graficos_sedes"
 LOGO_PATH = BASE_PATH / "logo.png"
 
+# Enviar solo los marcadores (o clusters) de la ventana visible del mapa
+MODO_VIEWPORT = True
+
 # --- FUNCIONES AUXILIARES ---
 @st.cache_data
 def cargar_coordenadas():
@@ -44,7 +48,25 @@ def obtener_imagen_base64(ruta_imagen):
         return base64.b64encode(ruta_imagen.read_bytes()).decode()
     return ""
 
-def crear_mapa_interactivo(df):
+@st.cache_resource
+def crear_indice_espacial(df):
+    """Construye (una vez) el índice espacial sobre las coordenadas."""
+    return IndiceEspacial(df)
+
+def crear_marcador(row):
+    """Crea el marcador de Folium de una sede."""
+    # Simple popup con el nombre
+    popup_html = (
+        f"<b>{row['NombreSede']}</b>"
+    )
+    return folium.Marker(
+        location=[row['Latitud_sede'], row['Longitud_sede']],
+        popup=popup_html,
+        tooltip=row['NombreSede'],
+        icon=folium.Icon(color="blue", icon="university", prefix="fa")
+    )
+
+def crear_mapa_interactivo(df, incluir_marcadores=True):
     """Crea un mapa de Folium con marcadores para cada sede."""
     centro = [-33.45, -70.67]
     if not df.empty:
@@ -57,19 +79,14 @@ def crear_mapa_interactivo(df):
         control_scale=True
     )
 
+    # En modo por ventana los marcadores se envían aparte (ver capa_visible)
+    if not incluir_marcadores:
+        return mapa
+
     logo_b64 = obtener_imagen_base64(LOGO_PATH) if LOGO_PATH.exists() else ""
 
-    for _, row in df.iterrows():
-        # Simple popup con el nombre
-        popup_html = (
-            f"<b>{row['NombreSede']}</b>"
-        )
-        folium.Marker(
-            location=[row['Latitud_sede'], row['Longitud_sede']],
-            popup=popup_html,
-            tooltip=row['NombreSede'],
-            icon=folium.Icon(color="blue", icon="university", prefix="fa")
-        ).add_to(mapa)
+    for _, row in df.dropna(subset=['Latitud_sede', 'Longitud_sede']).iterrows():
+        crear_marcador(row).add_to(mapa)
 
     return mapa
 
@@ -92,13 +109,33 @@ with col1:
 
 with col2:
     st.header("📍 Mapa de Sedes")
-    mapa = crear_mapa_interactivo(df_sedes)
-    evento = st_folium(
-        mapa,
-        width=900,
-        height=600,
-        returned_objects=["last_clicked"]
-    )
+    if MODO_VIEWPORT:
+        # Solo se envían los marcadores de la última ventana visible del mapa
+        mapa = crear_mapa_interactivo(df_sedes, incluir_marcadores=False)
+        indice = crear_indice_espacial(df_sedes)
+        vista = st.session_state.get("mapa_sedes") or {}
+        capa = capa_visible(
+            indice,
+            limites_desde_evento(vista) or indice.limites(),
+            vista.get("zoom") or 5,
+            crear_marcador
+        )
+        evento = st_folium(
+            mapa,
+            key="mapa_sedes",
+            width=900,
+            height=600,
+            feature_group_to_add=capa,
+            returned_objects=["last_clicked", "bounds", "zoom"]
+        )
+    else:
+        mapa = crear_mapa_interactivo(df_sedes)
+        evento = st_folium(
+            mapa,
+            width=900,
+            height=600,
+            returned_objects=["last_clicked"]
+        )
     # Capturamos coordenadas de clic
     latlon = evento.get("last_clicked")
     sede_seleccionada = None
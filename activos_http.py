@@ -0,0 +1,110 @@
+"""Activos de sedes servidos por HTTP desde URLs estables, direccionadas por contenido.
+
+Las imágenes servidas con st.image viven en URLs de medios propias de cada sesión y el
+navegador no puede reutilizarlas. Aquí cada activo publicado en el almacén tiene una URL
+derivada de su hash (/activos/<sha256><ext>): si el contenido cambia, cambia la URL, así
+que la respuesta se puede cachear para siempre.
+
+    Cache-Control: public, max-age=31536000, immutable
+    ETag: "<sha256>"            (con If-None-Match se responde 304 sin cuerpo)
+
+Si el almacén guardó variantes precomprimidas (.br / .gz, ver almacen_activos) se
+entregan según Accept-Encoding, sin comprimir en cada petición.
+
+La ruta se monta con st.App (ver servidor.py), que además activa RUTAS_MONTADAS. Si la
+app se lanza con `streamlit run app.py`, url_activo devuelve None y la app sigue
+enviando los bytes.
+
+Junto a /activos se monta GET /listo para el balanceador: 200 cuando el proceso terminó
+el precalentamiento, 503 mientras tanto.
+"""
+import mimetypes
+import re
+
+from almacen_activos import generacion_actual, leer_manifiesto, ruta_objeto
+from precalentamiento import esta_listo
+
+# --- CONFIGURACIÓN ---
+RUTA_ACTIVOS = "/activos"
+RUTA_LISTO = "/listo"
+CACHE_INMUTABLE = "public, max-age=31536000, immutable"
+VARIANTES = (("br", ".br"), ("gzip", ".gz"))  # en orden de preferencia
+TIPOS = {".geojson": "application/geo+json", ".parquet": "application/vnd.apache.parquet"}
+ARCHIVO_VALIDO = re.compile(r"^([0-9a-f]{64})(\.[a-z0-9]{1,10})?$")
+RUTAS_MONTADAS = False  # servidor.py lo pone en True al montar las rutas con st.App
+
+
+# --- URLs ---
+def url_activo(nombre, generacion=None):
+    """URL inmutable del activo según el manifiesto vigente, o None si no se puede servir."""
+    if not RUTAS_MONTADAS:
+        return None
+    generacion = generacion or generacion_actual()
+    if not generacion:
+        return None
+    try:
+        entrada = leer_manifiesto(generacion).get(nombre)
+    except OSError:
+        return None
+    if entrada is None:
+        return None
+    return f"{RUTA_ACTIVOS}/{entrada['hash']}{entrada['extension']}"
+
+
+# --- SERVIDOR ---
+def _coincide(if_none_match, etag):
+    if if_none_match.strip() == "*":
+        return True
+    return etag in (e.strip().removeprefix("W/") for e in if_none_match.split(","))
+
+def _elegir_variante(ruta, accept_encoding):
+    """Devuelve (ruta, codificación) de la mejor variante precomprimida aceptada."""
+    aceptadas = {c.split(";")[0].strip() for c in accept_encoding.lower().split(",")}
+    for codificacion, sufijo in VARIANTES:
+        variante = ruta.with_name(ruta.name + sufijo)
+        if codificacion in aceptadas and variante.exists():
+            return variante, codificacion
+    return ruta, None
+
+async def servir_activo(request):
+    from starlette.responses import FileResponse, Response
+
+    coincidencia = ARCHIVO_VALIDO.match(request.path_params["archivo"])
+    if coincidencia is None:
+        return Response("Not Found", status_code=404)
+    hash_hex, extension = coincidencia.group(1), coincidencia.group(2) or ""
+    ruta = ruta_objeto(hash_hex, extension)
+    if not ruta.exists():
+        return Response("Not Found", status_code=404)
+
+    ruta, codificacion = _elegir_variante(ruta, request.headers.get("accept-encoding", ""))
+    # Cada representación tiene su propio ETag fuerte
+    etag = f'"{hash_hex}-{codificacion}"' if codificacion else f'"{hash_hex}"'
+    cabeceras = {"Cache-Control": CACHE_INMUTABLE, "ETag": etag}
+    if any(ruta_objeto(hash_hex, extension + sufijo).exists() for _, sufijo in VARIANTES):
+        cabeceras["Vary"] = "Accept-Encoding"
+
+    if _coincide(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=cabeceras)
+
+    if codificacion:
+        cabeceras["Content-Encoding"] = codificacion
+    tipo = TIPOS.get(extension) or mimetypes.guess_type(f"x{extension}")[0] or "application/octet-stream"
+    return FileResponse(ruta, media_type=tipo, headers=cabeceras)
+
+async def listo(request):
+    """Readiness del proceso: 503 hasta que termina el precalentamiento."""
+    from starlette.responses import PlainTextResponse
+
+    if esta_listo():
+        return PlainTextResponse("listo", headers={"Cache-Control": "no-store"})
+    return PlainTextResponse("precalentando", status_code=503, headers={"Cache-Control": "no-store"})
+
+def rutas():
+    """Rutas a montar con st.App."""
+    from starlette.routing import Route
+
+    return [
+        Route(f"{RUTA_ACTIVOS}/{{archivo}}", servir_activo, methods=["GET", "HEAD"]),
+        Route(RUTA_LISTO, listo, methods=["GET", "HEAD"]),
+    ]
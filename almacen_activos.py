@@ -0,0 +1,220 @@
+"""Almacén de activos derivados, direccionado por contenido y compartido entre réplicas.
+
+Estructura del directorio (local o montado en red, compartido por todas las réplicas):
+    objetos/ab/abcdef....png     contenido inmutable, nombrado por su SHA-256
+    objetos/ab/abcdef....json.gz variantes precomprimidas de los formatos de texto
+    generaciones/<id>.json       manifiesto: nombre lógico -> hash
+    ACTUAL                       puntero a la generación vigente
+
+Todas las escrituras son atómicas (archivo temporal + os.replace), así una réplica
+nunca ve un objeto a medio escribir y todas cambian de generación a la vez.
+
+Uso:
+    python almacen_activos.py publicar      # publica una nueva generación desde el repo
+    python almacen_activos.py limpiar [N]   # borra objetos no usados por las últimas N generaciones
+"""
+import gzip
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import streamlit as st
+
+# --- CONFIGURACIÓN ---
+ALMACEN_DIR = Path(os.environ.get("ALMACEN_ACTIVOS_DIR", Path(__file__).parent / ".almacen"))
+OBJETOS_DIR = ALMACEN_DIR / "objetos"
+GENERACIONES_DIR = ALMACEN_DIR / "generaciones"
+PUNTERO_FILE = ALMACEN_DIR / "ACTUAL"
+SEGUNDOS_REVISION = 10  # cada cuánto una réplica revisa si cambió la generación
+MAX_BYTES_EN_CACHE = 256 * 1024  # objetos mayores (PNG) se leen del disco en cada uso
+GRACIA_LIMPIEZA = 60 * 60  # segundos: limpiar no toca objetos más nuevos (publicación en curso)
+EXTENSIONES_COMPRIMIBLES = {".geojson", ".json", ".svg", ".csv", ".txt"}  # los PNG ya vienen comprimidos
+
+try:
+    import brotli
+except ImportError:  # opcional: sin brotli solo se genera la variante gzip
+    brotli = None
+
+
+# --- ESCRITURA ---
+def _escribir_atomico(destino, datos):
+    """Escribe en un temporal del mismo directorio y lo renombra sobre el destino."""
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    fd, temporal = tempfile.mkstemp(dir=destino.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(datos)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporal, destino)
+    except BaseException:
+        Path(temporal).unlink(missing_ok=True)
+        raise
+
+def ruta_objeto(hash_hex, extension=""):
+    return OBJETOS_DIR / hash_hex[:2] / f"{hash_hex}{extension}"
+
+def _precomprimir(hash_hex, extension, datos):
+    """Variantes .gz / .br para servirlas por HTTP sin comprimir en cada petición."""
+    variantes = {".gz": lambda d: gzip.compress(d, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variantes[".br"] = lambda d: brotli.compress(d, quality=11)
+    for sufijo, comprimir in variantes.items():
+        destino = ruta_objeto(hash_hex, extension + sufijo)
+        if not _tocar(destino):
+            comprimido = comprimir(datos)
+            if len(comprimido) < len(datos):
+                _escribir_atomico(destino, comprimido)
+
+def _tocar(ruta):
+    """Renueva la fecha de un objeto ya existente (así limpiar lo respeta); False si no existe."""
+    try:
+        os.utime(ruta)
+        return True
+    except FileNotFoundError:
+        return False
+
+def publicar_objeto(datos, extension=""):
+    """Guarda el contenido (si no existía) y devuelve su hash."""
+    hash_hex = hashlib.sha256(datos).hexdigest()
+    destino = ruta_objeto(hash_hex, extension)
+    if not _tocar(destino):
+        _escribir_atomico(destino, datos)
+    if extension in EXTENSIONES_COMPRIMIBLES:
+        _precomprimir(hash_hex, extension, datos)
+    return hash_hex
+
+def publicar_generacion(activos):
+    """Publica {nombre: (bytes, extensión)} como nueva generación y mueve el puntero."""
+    manifiesto = {}
+    for nombre, (datos, extension) in sorted(activos.items()):
+        manifiesto[nombre] = {
+            "hash": publicar_objeto(datos, extension),
+            "extension": extension,
+            "bytes": len(datos),
+        }
+
+    contenido = json.dumps({"creada": time.time(), "activos": manifiesto}, ensure_ascii=False, indent=1)
+    huella = hashlib.sha256(json.dumps(manifiesto, sort_keys=True).encode()).hexdigest()[:12]
+    generacion = f"{time.strftime('%Y%m%d-%H%M%S', time.gmtime())}-{huella}"  # UTC en todas las réplicas
+
+    # Primero el manifiesto, después el puntero: quien lea ACTUAL siempre encuentra la generación
+    _escribir_atomico(GENERACIONES_DIR / f"{generacion}.json", contenido.encode("utf-8"))
+
+    # Un limpiar concurrente pudo borrar un objeto viejo entre su stat() y nuestro _tocar():
+    # justo antes de mover el puntero se reescribe lo que falte (y queda protegido por la gracia)
+    for nombre, (datos, extension) in activos.items():
+        destino = ruta_objeto(manifiesto[nombre]["hash"], extension)
+        if not destino.exists():
+            _escribir_atomico(destino, datos)
+
+    _escribir_atomico(PUNTERO_FILE, generacion.encode("utf-8"))
+    return generacion
+
+
+# --- LECTURA ---
+def _leer_puntero():
+    try:
+        return PUNTERO_FILE.read_text(encoding="utf-8").strip() or None
+    except OSError:
+        return None
+
+@st.cache_data(ttl=SEGUNDOS_REVISION, show_spinner=False)
+def generacion_actual():
+    """Devuelve el id de la generación vigente, o None si el almacén está vacío."""
+    return _leer_puntero()
+
+@st.cache_data(show_spinner=False)
+def leer_manifiesto(generacion):
+    """Las generaciones son inmutables: se leen una vez por proceso."""
+    ruta = GENERACIONES_DIR / f"{generacion}.json"
+    return json.loads(ruta.read_text(encoding="utf-8"))["activos"]
+
+@st.cache_resource(show_spinner=False, max_entries=64)
+def leer_objeto(hash_hex, extension=""):
+    """Objetos pequeños e inmutables (coordenadas, capa regional, logo): como mucho
+    64 x MAX_BYTES_EN_CACHE por proceso."""
+    return ruta_objeto(hash_hex, extension).read_bytes()
+
+def leer_activo(nombre, generacion=None):
+    """Devuelve los bytes del activo en la generación vigente, o None si no está publicado."""
+    generacion = generacion or generacion_actual()
+    if generacion is None:
+        return None
+    try:
+        entrada = leer_manifiesto(generacion).get(nombre)
+        if entrada is None:
+            return None
+        if entrada.get("bytes", 0) > MAX_BYTES_EN_CACHE:
+            # Las imágenes no se copian en la memoria de cada réplica: el page cache del
+            # sistema ya las comparte, y con servidor.py se sirven directo del disco
+            return ruta_objeto(entrada["hash"], entrada["extension"]).read_bytes()
+        return leer_objeto(entrada["hash"], entrada["extension"])
+    except OSError:
+        return None
+
+
+# --- MANTENCIÓN ---
+def _generaciones_por_fecha():
+    """[(ruta, activos)] de la más antigua a la más nueva según "creada" (no según el nombre,
+    que en generaciones antiguas usaba la hora local)."""
+    generaciones = []
+    for ruta in GENERACIONES_DIR.glob("*.json"):
+        try:
+            datos = json.loads(ruta.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            continue  # otro limpiar concurrente ya la borró
+        generaciones.append((datos.get("creada", 0), ruta.name, ruta, datos["activos"]))
+    generaciones.sort()
+    return [(ruta, activos) for _, _, ruta, activos in generaciones]
+
+def limpiar(conservar=3, gracia=GRACIA_LIMPIEZA):
+    """Borra generaciones antiguas y los objetos que ya no referencia ninguna vigente.
+
+    Otra réplica puede estar publicando: sus objetos se escriben antes que el manifiesto,
+    así que no se borran los modificados hace menos de `gracia` segundos.
+    """
+    conservar = max(conservar, 1)
+    generaciones = _generaciones_por_fecha()
+    actual = _leer_puntero()
+    vigentes = generaciones[-conservar:]
+    for ruta, activos in generaciones[:-conservar]:
+        if ruta.stem != actual:
+            ruta.unlink(missing_ok=True)
+        else:
+            vigentes.append((ruta, activos))
+
+    en_uso = set()
+    for _, activos in vigentes:
+        en_uso.update(entrada["hash"] for entrada in activos.values())
+
+    borrados = 0
+    limite = time.time() - gracia
+    for ruta in OBJETOS_DIR.glob("*/*"):
+        if ruta.name.split(".")[0] in en_uso or ruta.name.startswith(".tmp-"):
+            continue
+        try:
+            if ruta.stat().st_mtime > limite:
+                continue
+            ruta.unlink()
+            borrados += 1
+        except FileNotFoundError:
+            pass  # otra réplica lo borró primero
+    return borrados
+
+
+if __name__ == "__main__":
+    comando = sys.argv[1] if len(sys.argv) > 1 else "publicar"
+    if comando == "publicar":
+        from datos_sedes import construir_activos
+
+        print(f"Generación publicada: {publicar_generacion(construir_activos())}")
+    elif comando == "limpiar":
+        conservar = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+        print(f"Objetos borrados: {limpiar(conservar)}")
+    else:
+        sys.exit(__doc__)
@@ -1,10 +1,22 @@
 import streamlit as st
 from streamlit_folium import st_folium
-import folium
-import pandas as pd
 import os
-from pathlib import Path
-import base64
+from indice_espacial import IndiceEspacial, capa_visible, limites_desde_evento
+from datos_sedes import (
+    LOGO_PATH,
+    cargar_coordenadas,
+    crear_marcador,
+    crear_mapa_interactivo,
+    leer_imagen,
+    nombre_activo,
+    obtener_imagen_base64,
+    ruta_grafico,
+    sede_desde_popup,
+)
+from activos_http import url_activo
+from precalentamiento import esta_listo, precalentar, registrar_acceso
+from sesiones import aplicar_politica, mostrar_panel_admin, registrar_sesion
+from capa_regional import agregar_coropletas, cargar_capa_regional
 
 # Configuración de la página
 st.set_page_config(
@@ -14,99 +26,38 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# --- CONFIGURACIÓN DE RUTAS ---
-BASE_PATH = Path(__file__).parent
-COOR_FILE = BASE_PATH / "Coordenadas_Sedes.xlsx"
-GRAFICOS_DIR = BASE_PATH / "graficos_sedes"
-LOGO_PATH = BASE_PATH / "logo.png"  # Opcional: si tienes un logo
+# Enviar solo los marcadores (o clusters) de la ventana visible del mapa
+MODO_VIEWPORT = True
+
+# Vista de administración: ?admin=<ADMIN_TOKEN> (desactivada si no se define)
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
 
 # --- FUNCIONES AUXILIARES ---
-@st.cache_data
-def cargar_coordenadas():
-    """Carga el archivo de coordenadas y maneja errores."""
-    try:
-        if not COOR_FILE.exists():
-            st.error(f"Archivo no encontrado: {COOR_FILE}")
-            return pd.DataFrame()
-        return pd.read_excel(COOR_FILE)
-    except Exception as e:
-        st.error(f"Error al cargar coordenadas: {str(e)}")
-        return pd.DataFrame()
-
-@st.cache_data
-def obtener_imagen_base64(ruta_imagen):
-    """Convierte una imagen a base64 para usarla en HTML."""
-    if ruta_imagen.exists():
-        with open(ruta_imagen, "rb") as img_file:
-            return base64.b64encode(img_file.read()).decode()
-    return ""
-
-# Cargar datos de coordenadas
-df_sedes = cargar_coordenadas()
+@st.cache_resource
+def crear_indice_espacial(df):
+    """Construye (una vez) el índice espacial sobre las coordenadas."""
+    return IndiceEspacial(df)
 
-# --- FUNCIÓN PARA CREAR MAPA INTERACTIVO ---
-def crear_mapa_interactivo(df):
-    """Crea un mapa de Folium con marcadores para cada sede."""
-    if df.empty:
-        return folium.Map(location=[-33.45, -70.67], zoom_start=5)
-    
-    centro = [df['Latitud_sede'].mean(), df['Longitud_sede'].mean()]
-    
-    # Configurar mapa base
-    mapa = folium.Map(
-        location=centro, 
-        zoom_start=5,
-        tiles='CartoDB Positron',
-        control_scale=True,
-        attr='Mapa de Sedes'
-    )
-    
-    # Cargar logo en base64 (si existe)
-    logo_base64 = obtener_imagen_base64(LOGO_PATH) if LOGO_PATH else ""
-    
-    # Añadir marcadores
-    for _, row in df.iterrows():
-        # HTML personalizado para el popup
-        logo_html = f"""
-        <div style="text-align:center;">
-            <img src="data:image/png;base64,{logo_base64}" width="80" style="margin-bottom:10px;">
-        </div>
-        """ if logo_base64 else ""
-        
-        popup_html = f"""
-        <div style="font-family: Arial, sans-serif; text-align: center; width: 200px;">
-            {logo_html}
-            <h4 style="margin-bottom: 10px; color: #2c3e50;">{row['NombreSede']}</h4>
-            <button style="
-                background-color: #3498db;
-                border: none;
-                color: white;
-                padding: 8px 16px;
-                text-align: center;
-                text-decoration: none;
-                display: inline-block;
-                font-size: 14px;
-                margin: 4px 2px;
-                cursor: pointer;
-                border-radius: 4px;
-                transition: background-color 0.3s;"
-                onmouseover="this.style.backgroundColor='#2980b9'"
-                onmouseout="this.style.backgroundColor='#3498db'"
-                onclick="window.parent.postMessage('{row['NombreSede']}', '*')">
-                Ver Gráficos
-            </button>
-        </div>
-        """
-        
-        # Añadir marcador al mapa
-        folium.Marker(
-            location=[row['Latitud_sede'], row['Longitud_sede']],
-            popup=folium.Popup(popup_html, max_width=250),
-            tooltip=f"Click para {row['NombreSede']}",
-            icon=folium.Icon(color="blue", icon="university", prefix="fa")
-        ).add_to(mapa)
-    
-    return mapa
+@st.cache_resource
+def precalentar_proceso():
+    """Precalienta las cachés si la app no se lanzó con precalentamiento.py."""
+    if not esta_listo():
+        precalentar()
+
+precalentar_proceso()
+
+# Contabilidad de memoria por sesión
+if registrar_sesion():
+    st.toast("🔄 Recargamos los gráficos tras un periodo de inactividad.")
+aplicar_politica()
+
+if ADMIN_TOKEN and st.query_params.get("admin") == ADMIN_TOKEN:
+    mostrar_panel_admin()
+    st.stop()
+
+# Cargar datos de coordenadas y capa regional precalculada (python capa_regional.py)
+df_sedes = cargar_coordenadas()
+capa_regional = cargar_capa_regional()
 
 # --- INTERFAZ DE LA APLICACIÓN ---
 st.title("📊 Análisis de Sedes - Admisión 2025")
@@ -142,30 +93,89 @@ with col1:
     st.markdown("- PDT (2020-2022)")
     st.markdown("- PAES (2023-2025)")
     
+    # Comparación regional sobre el mapa
+    st.divider()
+    st.subheader("🗺️ Comparación Regional")
+    colorear_regiones = False
+    if capa_regional and capa_regional["features"]:
+        colorear_regiones = st.toggle("Colorear regiones", value=False)
+        metrica_regional = st.selectbox("Métrica", capa_regional["metricas"], disabled=not colorear_regiones)
+        anio_regional = st.selectbox(
+            "Año",
+            capa_regional["anios"],
+            index=len(capa_regional["anios"]) - 1,
+            disabled=not colorear_regiones
+        )
+        if capa_regional.get("fuente"):
+            st.caption(f"⚠️ Límites regionales: {capa_regional['fuente']}.")
+    else:
+        st.caption(
+            "Para activar esta vista agrega `Admision_Sedes.xlsx` (NombreSede, Anio y "
+            "métricas por sede) y ejecuta `python capa_regional.py`."
+        )
+    
     # Espacio para logo (opcional)
     if LOGO_PATH and LOGO_PATH.exists():
         st.divider()
-        st.image(str(LOGO_PATH), width=150)
+        logo_url = url_activo(nombre_activo(LOGO_PATH))
+        if logo_url:
+            st.markdown(f'<img src="{logo_url}" width="150">', unsafe_allow_html=True)
+        else:
+            st.image(str(LOGO_PATH), width=150)
 
 # Mapa principal
 with col2:
     st.header("📍 Ubicación de Sedes")
     
     # Crear y mostrar mapa
-    mapa = crear_mapa_interactivo(df_sedes)
-    evento = st_folium(
-        mapa, 
-        width=900, 
-        height=600,
-        returned_objects=["last_object_clicked_popup"]
-    )
+    if MODO_VIEWPORT:
+        # El mapa base no lleva marcadores: se consultan según la última ventana visible
+        mapa = crear_mapa_interactivo(df_sedes, incluir_marcadores=False)
+        if colorear_regiones:
+            agregar_coropletas(mapa, capa_regional, metrica_regional, anio_regional)
+        indice = crear_indice_espacial(df_sedes)
+        vista = st.session_state.get("mapa_sedes") or {}
+        limites = limites_desde_evento(vista) or indice.limites()
+        logo_url = url_activo(nombre_activo(LOGO_PATH))
+        logo_base64 = "" if logo_url else obtener_imagen_base64(LOGO_PATH)
+        capa = capa_visible(
+            indice,
+            limites,
+            vista.get("zoom") or 5,
+            lambda row: crear_marcador(row, logo_base64, logo_url)
+        )
+        evento = st_folium(
+            mapa,
+            key="mapa_sedes",
+            width=900,
+            height=600,
+            feature_group_to_add=capa,
+            returned_objects=["last_object_clicked_popup", "bounds", "zoom"]
+        )
+    else:
+        mapa = crear_mapa_interactivo(df_sedes)
+        if colorear_regiones:
+            agregar_coropletas(mapa, capa_regional, metrica_regional, anio_regional)
+        evento = st_folium(
+            mapa, 
+            width=900, 
+            height=600,
+            returned_objects=["last_object_clicked_popup"]
+        )
     
     # Manejar selección de sede
     sede_seleccionada = st.session_state.get('sede_activa', None)
     
+    # El popup llega como texto visible ("Sede\n\nVer Gráficos"): se traduce a NombreSede
+    sede_clic = None
     if evento and evento.get("last_object_clicked_popup"):
-        sede_seleccionada = evento["last_object_clicked_popup"]
+        sede_clic = sede_desde_popup(evento["last_object_clicked_popup"], df_sedes["NombreSede"])
+    
+    # Solo se reejecuta si cambió la sede (mover el mapa también dispara eventos)
+    if sede_clic and sede_clic != sede_seleccionada:
+        sede_seleccionada = sede_clic
         st.session_state.sede_activa = sede_seleccionada
+        registrar_acceso(sede_seleccionada)
         
         # CORRECCIÓN: Usar st.rerun() en lugar de st.experimental_rerun()
         st.rerun()
@@ -175,24 +185,35 @@ if sede_seleccionada:
     st.divider()
     st.header(f"📈 Análisis de: {sede_seleccionada}")
     
-    # Ruta al archivo PNG
-    ruta_grafico = GRAFICOS_DIR / f"{sede_seleccionada}_graficos.png"
+    # URL inmutable (la cachea el navegador) o, si no se sirve por /activos, los bytes del PNG
+    imagen_url = url_activo(nombre_activo(ruta_grafico(sede_seleccionada)))
+    imagen = None if imagen_url else leer_imagen(ruta_grafico(sede_seleccionada))
     
     try:
+        if imagen_url:
+            st.markdown(
+                f'<img src="{imagen_url}" style="width:100%" alt="Gráficos de {sede_seleccionada}">',
+                unsafe_allow_html=True
+            )
+            st.markdown(
+                f'<a href="{imagen_url}" download="{sede_seleccionada}_graficos.png">⬇️ Descargar gráficos</a>',
+                unsafe_allow_html=True
+            )
         # Verificar si existe el gráfico
-        if ruta_grafico.exists():
+        elif imagen is not None:
             # Mostrar gráficos
-            st.image(str(ruta_grafico), use_column_width=True)
+            st.image(imagen, use_column_width=True)
             
-            # Botón de descarga
-            with open(ruta_grafico, "rb") as file:
-                btn = st.download_button(
-                    label="⬇️ Descargar gráficos",
-                    data=file,
-                    file_name=f"{sede_seleccionada}_graficos.png",
-                    mime="image/png",
-                    use_container_width=True
-                )
+            # Botón de descarga (bytes generados al hacer clic: siguen disponibles
+            # aunque la política de sesiones haya liberado los medios de esta pestaña)
+            ruta_descarga = ruta_grafico(sede_seleccionada)
+            btn = st.download_button(
+                label="⬇️ Descargar gráficos",
+                data=lambda: leer_imagen(ruta_descarga),
+                file_name=f"{sede_seleccionada}_graficos.png",
+                mime="image/png",
+                use_container_width=True
+            )
         else:
             st.error(f"⚠️ No se encontraron gráficos para {sede_seleccionada}")
             st.info("""
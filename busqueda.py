@@ -0,0 +1,182 @@
+import bisect
+import unicodedata
+from collections import Counter, defaultdict
+
+import streamlit as st
+
+from regiones_sedes import COMUNA_REGION, REGIONES
+
+# --- PARÁMETROS ---
+PALABRAS_VACIAS = {"de", "del", "la", "las", "el", "los", "y", "region"}
+UMBRAL_SIMILITUD = 0.6   # coeficiente de Dice mínimo para aceptar un resultado con errores
+MAX_CANDIDATOS = 200     # textos a comparar por trigramas como máximo
+FRACCION_TRIGRAMA_COMUN = 0.05  # trigramas presentes en más textos que esto no generan candidatos
+MAX_RESULTADOS = 10
+
+
+def normalizar(texto):
+    """Minúsculas, sin tildes ni eñes y sin puntuación: 'Peñalolén' -> 'penalolen'."""
+    descompuesto = unicodedata.normalize("NFKD", str(texto))
+    sin_tildes = "".join(c for c in descompuesto if not unicodedata.combining(c))
+    limpio = "".join(c if c.isalnum() else " " for c in sin_tildes.casefold())
+    return " ".join(limpio.split())
+
+def trigramas(texto):
+    relleno = f"  {texto} "
+    return {relleno[i:i + 3] for i in range(len(relleno) - 2)}
+
+
+class IndiceBusqueda:
+    """Índice de prefijos y trigramas sobre textos normalizados, construido una sola vez."""
+
+    # Niveles de prefijo, del más al menos relevante
+    NIVELES = ("nombre", "palabra del nombre", "alias", "palabra del alias")
+
+    def __init__(self, entradas, exactos=None):
+        """entradas: {resultado: [textos]} (el primero es el nombre); exactos: solo coincidencia completa."""
+        self.resultados = list(entradas)
+        niveles = [set() for _ in self.NIVELES]
+        self._palabras_id = [set() for _ in self.resultados]
+        textos_trigramas = defaultdict(set)
+        self._exactos = defaultdict(set)
+
+        for id_, textos in enumerate(entradas.values()):
+            for orden, texto in enumerate(textos):
+                frase = normalizar(texto)
+                if not frase:
+                    continue
+                nivel = 0 if orden == 0 else 2
+                niveles[nivel].add((frase, id_))
+                for palabra in frase.split():
+                    if palabra not in PALABRAS_VACIAS:
+                        niveles[nivel + 1].add((palabra, id_))
+                        self._palabras_id[id_].add(palabra)
+                        textos_trigramas[palabra].add(id_)
+                textos_trigramas[frase].add(id_)
+
+        for resultado, textos in (exactos or {}).items():
+            id_ = self.resultados.index(resultado)
+            for texto in textos:
+                self._exactos[normalizar(texto)].add(id_)
+
+        # Cada nivel es una lista ordenada de términos (para bisect) con su resultado
+        self._niveles = []
+        for terminos in niveles:
+            ordenados = sorted(terminos)
+            self._niveles.append(([t for t, _ in ordenados], [id_ for _, id_ in ordenados]))
+
+        # Trigramas por texto distinto (frases y palabras) para tolerar errores de tipeo
+        self._textos = [(texto, sorted(ids)) for texto, ids in textos_trigramas.items()]
+        self._tris_texto = [trigramas(texto) for texto, _ in self._textos]
+        self._trigramas = defaultdict(list)
+        for pos, tris in enumerate(self._tris_texto):
+            for tri in tris:
+                self._trigramas[tri].append(pos)
+
+    def _prefijos(self, q, puntaje, limite):
+        for nivel, (terminos, ids) in enumerate(self._niveles):
+            i = bisect.bisect_left(terminos, q)
+            while i < len(terminos) and terminos[i].startswith(q) and len(puntaje) < limite:
+                # Se conserva el mejor puntaje (p.ej. "v" es el número de Valparaíso y prefijo del nombre)
+                puntaje[ids[i]] = min(puntaje.get(ids[i], nivel), nivel)
+                i += 1
+
+    def _rango(self, nivel, prefijo):
+        terminos = self._niveles[nivel][0]
+        return bisect.bisect_left(terminos, prefijo), bisect.bisect_left(terminos, prefijo + "\uffff")
+
+    def _todas_las_palabras(self, q, puntaje, limite):
+        """Consultas de varias palabras: cada palabra debe ser prefijo de alguna palabra del resultado."""
+        palabras = [p for p in q.split() if p not in PALABRAS_VACIAS]
+        if len(palabras) < 2:
+            return
+        # Se parte por la palabra más selectiva y se verifican las demás por resultado
+        rangos = {p: [self._rango(n, p) for n in (1, 3)] for p in palabras}
+        palabras.sort(key=lambda p: sum(fin - ini for ini, fin in rangos[p]))
+        for nivel, (ini, fin) in zip((1, 3), rangos[palabras[0]]):
+            for id_ in self._niveles[nivel][1][ini:fin]:
+                if len(puntaje) >= limite:
+                    return
+                if puntaje.get(id_, nivel + 0.5) < nivel + 0.5:
+                    continue
+                propias = self._palabras_id[id_]
+                if all(any(w.startswith(p) for w in propias) for p in palabras[1:]):
+                    puntaje[id_] = nivel + 0.5
+
+    def _aproximados(self, q, puntaje, limite):
+        tris = trigramas(q)
+        # Candidatos: los textos que comparten más trigramas poco frecuentes con la consulta
+        max_posiciones = max(MAX_CANDIDATOS, FRACCION_TRIGRAMA_COMUN * len(self._textos))
+        comunes = Counter(
+            pos
+            for tri in tris
+            if len(self._trigramas.get(tri, ())) <= max_posiciones
+            for pos in self._trigramas.get(tri, ())
+        )
+        mejores = {}
+        for pos, _ in comunes.most_common(MAX_CANDIDATOS):
+            compartidos = len(tris & self._tris_texto[pos])
+            dice = 2 * compartidos / (len(tris) + len(self._tris_texto[pos]))
+            if dice < UMBRAL_SIMILITUD:
+                continue
+            for id_ in self._textos[pos][1]:
+                if id_ not in puntaje:
+                    mejores[id_] = max(mejores.get(id_, 0), dice)
+        for id_, dice in sorted(mejores.items(), key=lambda par: -par[1])[:limite - len(puntaje)]:
+            puntaje[id_] = len(self.NIVELES) + 1 - dice
+
+    def buscar(self, consulta, limite=MAX_RESULTADOS):
+        """Devuelve los resultados ordenados: prefijos primero, luego coincidencias aproximadas."""
+        q = normalizar(consulta)
+        if not q:
+            return []
+
+        puntaje = {}
+        for id_ in self._exactos.get(q, ()):
+            puntaje[id_] = 2
+        self._prefijos(q, puntaje, limite)
+        if len(puntaje) < limite:
+            self._todas_las_palabras(q, puntaje, limite)
+
+        # Tolerancia a errores de tipeo solo si faltan resultados
+        if len(puntaje) < limite and len(q) >= 3:
+            self._aproximados(q, puntaje, limite)
+
+        orden = sorted(puntaje, key=lambda id_: (puntaje[id_], self.resultados[id_]))
+        return [self.resultados[id_] for id_ in orden[:limite]]
+
+
+def construir_indice_sedes(sedes):
+    """Indexa cada sede por su nombre, comuna, región y alias de la región."""
+    entradas, exactos = {}, {}
+    for sede in sedes:
+        comuna, region = COMUNA_REGION.get(sede, (None, None))
+        textos = [sede]
+        if comuna:
+            textos.append(comuna)
+        if region:
+            textos += [region, *REGIONES[region]["alias"]]
+            exactos[sede] = [REGIONES[region]["numero"]]
+        entradas[sede] = textos
+    return IndiceBusqueda(entradas, exactos)
+
+@st.cache_resource
+def indice_sedes(sedes):
+    """Índice de sedes compartido por todas las sesiones (sedes: tupla)."""
+    return construir_indice_sedes(sedes)
+
+def selector_sede(sedes, etiqueta="Sede:", contenedor=st, key=None):
+    """Cuadro de búsqueda sin tildes + selectbox con los resultados."""
+    consulta = contenedor.text_input(
+        "🔎 Buscar sede",
+        placeholder="Ej: penalolen, conce, biobio, RM",
+        key=f"{key}_busqueda" if key else None
+    )
+    opciones = list(sedes)
+    if consulta:
+        encontradas = indice_sedes(tuple(sedes)).buscar(consulta, limite=len(opciones))
+        if encontradas:
+            opciones = encontradas
+        else:
+            contenedor.warning(f"Sin resultados para «{consulta}».")
+    return contenedor.selectbox(etiqueta, opciones, key=key)
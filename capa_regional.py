@@ -0,0 +1,315 @@
+"""Capa regional precalculada (coropletas) para comparar regiones en el mapa nacional.
+
+Entrada: Admision_Sedes.xlsx con una fila por sede y año:
+    NombreSede | Anio | <métricas numéricas, p.ej. Postulantes, Matriculados, PuntajePromedio>
+La región de cada sede sale de sus coordenadas (Coordenadas_Sedes.xlsx) según la geometría
+regional; solo si una sede cae fuera de todo polígono se usa la tabla de regiones_sedes.
+Las métricas cuyo nombre sugiere un promedio/tasa se promedian por región; el resto se suma.
+
+Este archivo no viene en el repo: hay que agregarlo antes de precalcular la capa.
+
+Salida: regiones_agregadas.geojson, con la geometría simplificada de cada región y sus
+métricas por año. Al terminar se publica una nueva generación del almacén compartido
+(con el resto de los activos), así la app toma la capa nueva sin reiniciar.
+
+Uso:
+    python capa_regional.py [--admision ruta.xlsx] [--geometria limites.geojson]
+                            [--campo-region NOMBRE] [--tolerancia 0.02]
+"""
+import argparse
+import io
+import json
+import math
+import sys
+from pathlib import Path
+
+import branca.colormap as cm
+import folium
+import pandas as pd
+import streamlit as st
+
+from almacen_activos import generacion_actual, leer_activo, publicar_generacion
+from busqueda import normalizar
+from regiones_sedes import COMUNA_REGION, REGIONES
+
+# --- CONFIGURACIÓN ---
+BASE_PATH = Path(__file__).parent
+ADMISION_FILE = BASE_PATH / "Admision_Sedes.xlsx"
+COOR_FILE = BASE_PATH / "Coordenadas_Sedes.xlsx"
+GEOMETRIA_FILE = BASE_PATH / "regiones_chile.geojson"   # esquemática; se puede reemplazar por límites oficiales
+SALIDA_FILE = BASE_PATH / "regiones_agregadas.geojson"
+SALIDA_ACTIVO = "regiones_agregadas.geojson"
+TOLERANCIA = 0.02       # grados (~2 km) para simplificar los polígonos
+DECIMALES = 3           # ~100 m, suficiente para un mapa nacional
+PALABRAS_PROMEDIO = ("promedio", "puntaje", "tasa", "porcentaje", "media")
+COLUMNAS_ESPERADAS = "NombreSede, Anio (o Año) y al menos una métrica numérica por sede"
+
+
+# --- AGREGACIÓN ---
+def es_promedio(columna):
+    return any(palabra in normalizar(columna) for palabra in PALABRAS_PROMEDIO)
+
+def agregar_por_region(df_admision, df_coordenadas, regiones):
+    """Asigna a cada sede la región que contiene sus coordenadas y resume por región y año.
+
+    regiones: [(región, polígonos)] de regiones_de_geometria.
+    """
+    df_admision = df_admision.rename(columns={"Año": "Anio"})
+    faltantes = {"NombreSede", "Anio"} - set(df_admision.columns)
+    if faltantes:
+        raise ValueError(f"Faltan columnas {sorted(faltantes)}; se esperan: {COLUMNAS_ESPERADAS}")
+    df = df_admision.merge(
+        df_coordenadas[["NombreSede", "Latitud_sede", "Longitud_sede"]],
+        on="NombreSede",
+        how="left"
+    )
+    lons = pd.to_numeric(df["Longitud_sede"], errors="coerce")
+    lats = pd.to_numeric(df["Latitud_sede"], errors="coerce")
+    por_punto = [
+        region_de_punto(lon, lat, regiones) if pd.notna(lon) and pd.notna(lat) else None
+        for lon, lat in zip(lons, lats)
+    ]
+    por_tabla = df["NombreSede"].map({sede: region for sede, (_, region) in COMUNA_REGION.items()})
+    df["Region"] = pd.Series(por_punto, index=df.index, dtype=object).fillna(por_tabla)
+    df = df.dropna(subset=["Region"])  # p.ej. "Sede Virtual"
+
+    metricas = [
+        c for c in df.select_dtypes("number").columns
+        if c not in ("Anio", "Latitud_sede", "Longitud_sede")
+    ]
+    agregaciones = {m: (m, "mean" if es_promedio(m) else "sum") for m in metricas}
+    return (
+        df.groupby(["Region", "Anio"])
+        .agg(**agregaciones, Sedes=("NombreSede", "nunique"))
+        .reset_index()
+    )
+
+
+# --- GEOMETRÍA ---
+def _distancia_segmento(p, a, b):
+    (x, y), (x1, y1), (x2, y2) = p, a, b
+    dx, dy = x2 - x1, y2 - y1
+    if dx == dy == 0:
+        return math.hypot(x - x1, y - y1)
+    t = max(0, min(1, ((x - x1) * dx + (y - y1) * dy) / (dx * dx + dy * dy)))
+    return math.hypot(x - (x1 + t * dx), y - (y1 + t * dy))
+
+def simplificar(puntos, tolerancia):
+    """Douglas-Peucker iterativo sobre una polilínea."""
+    if len(puntos) < 3:
+        return list(puntos)
+    conservar = [False] * len(puntos)
+    conservar[0] = conservar[-1] = True
+    pendientes = [(0, len(puntos) - 1)]
+    while pendientes:
+        ini, fin = pendientes.pop()
+        lejano, distancia = None, tolerancia
+        for i in range(ini + 1, fin):
+            d = _distancia_segmento(puntos[i], puntos[ini], puntos[fin])
+            if d > distancia:
+                lejano, distancia = i, d
+        if lejano is not None:
+            conservar[lejano] = True
+            pendientes += [(ini, lejano), (lejano, fin)]
+    return [p for p, c in zip(puntos, conservar) if c]
+
+def _simplificar_anillo(anillo, tolerancia):
+    simple = simplificar(anillo, tolerancia)
+    if len(simple) < 4:  # un anillo válido necesita al menos 4 puntos
+        simple = anillo
+    return [[round(x, DECIMALES), round(y, DECIMALES)] for x, y in simple]
+
+def _poligonos(geometria):
+    if geometria["type"] == "Polygon":
+        return [geometria["coordinates"]]
+    if geometria["type"] == "MultiPolygon":
+        return geometria["coordinates"]
+    raise ValueError(f"Geometría no soportada: {geometria['type']}")
+
+def simplificar_geometria(geometria, tolerancia):
+    simples = [[_simplificar_anillo(anillo, tolerancia) for anillo in poligono] for poligono in _poligonos(geometria)]
+    if len(simples) == 1:
+        return {"type": "Polygon", "coordinates": simples[0]}
+    return {"type": "MultiPolygon", "coordinates": simples}
+
+def _punto_en_anillo(x, y, anillo):
+    """Ray casting: cuántas aristas cruza una semirrecta hacia el este."""
+    dentro = False
+    for (x1, y1), (x2, y2) in zip(anillo, anillo[1:] + anillo[:1]):
+        if (y1 > y) != (y2 > y) and x < x1 + (y - y1) * (x2 - x1) / (y2 - y1):
+            dentro = not dentro
+    return dentro
+
+def region_de_punto(lon, lat, regiones):
+    """Región cuyo polígono (descontando huecos) contiene el punto, o None."""
+    for region, poligonos in regiones:
+        for exterior, *huecos in poligonos:
+            if _punto_en_anillo(lon, lat, exterior) and not any(
+                _punto_en_anillo(lon, lat, hueco) for hueco in huecos
+            ):
+                return region
+    return None
+
+def regiones_de_geometria(geojson, campo_region="region"):
+    """[(región canónica, polígonos)] de las features reconocidas."""
+    nombres = _nombres_region()
+    regiones = []
+    for feature in geojson["features"]:
+        region = _region_de_nombre(feature["properties"].get(campo_region, ""), nombres)
+        if region is not None:
+            regiones.append((region, _poligonos(feature["geometry"])))
+    return regiones
+
+def _nombres_region():
+    """Nombre normalizado (o alias) -> nombre canónico de la región."""
+    nombres = {}
+    for region, datos in REGIONES.items():
+        for nombre in [region, *datos["alias"]]:
+            nombres[normalizar(nombre)] = region
+    return nombres
+
+def _region_de_nombre(nombre, nombres):
+    """Reconoce nombres oficiales largos ('Región Metropolitana de Santiago')."""
+    nombre = normalizar(nombre)
+    if nombre in nombres:
+        return nombres[nombre]
+    for region in sorted(REGIONES, key=len, reverse=True):
+        if normalizar(region) in nombre:
+            return region
+    return None
+
+
+# --- CONSTRUCCIÓN DE LA CAPA ---
+def construir_capa(agregados, geojson, campo_region="region", tolerancia=TOLERANCIA):
+    """GeoJSON compacto: una feature por región con {año: {métrica: valor}}."""
+    nombres = _nombres_region()
+    metricas = [c for c in agregados.columns if c not in ("Region", "Anio")]
+    valores = {}
+    for fila in agregados.to_dict("records"):
+        por_anio = valores.setdefault(fila["Region"], {})
+        por_anio[str(int(fila["Anio"]))] = {
+            m: (None if pd.isna(fila[m]) else round(float(fila[m]), 2)) for m in metricas
+        }
+
+    features = []
+    for feature in geojson["features"]:
+        region = _region_de_nombre(feature["properties"].get(campo_region, ""), nombres)
+        if region is None:
+            continue
+        features.append({
+            "type": "Feature",
+            "properties": {"region": region, "valores": valores.get(region, {})},
+            "geometry": simplificar_geometria(feature["geometry"], tolerancia),
+        })
+
+    anios = sorted({str(int(a)) for a in agregados["Anio"].unique()})
+    fuente = geojson.get("properties", {}).get("fuente")  # p.ej. geometría esquemática
+    return {
+        "type": "FeatureCollection",
+        "metricas": metricas,
+        "anios": anios,
+        "fuente": fuente,
+        "features": features,
+    }
+
+def precalcular(admision=ADMISION_FILE, geometria=GEOMETRIA_FILE, campo_region="region",
+                tolerancia=TOLERANCIA, salida=SALIDA_FILE, publicar=True):
+    if not Path(admision).exists():
+        raise FileNotFoundError(
+            f"No se encontró {admision}. Agrega un Excel con una fila por sede y año "
+            f"con las columnas: {COLUMNAS_ESPERADAS}."
+        )
+    df_admision = pd.read_excel(admision)
+    df_coordenadas = pd.read_excel(COOR_FILE)
+    geojson = json.loads(Path(geometria).read_text(encoding="utf-8"))
+    agregados = agregar_por_region(df_admision, df_coordenadas, regiones_de_geometria(geojson, campo_region))
+    capa = construir_capa(agregados, geojson, campo_region, tolerancia)
+    Path(salida).write_text(
+        json.dumps(capa, ensure_ascii=False, separators=(",", ":")),
+        encoding="utf-8"
+    )
+    if publicar and Path(salida) == SALIDA_FILE:  # construir_activos publica SALIDA_FILE
+        from datos_sedes import construir_activos  # datos_sedes importa este módulo
+
+        capa["generacion"] = publicar_generacion(construir_activos())
+    return capa
+
+
+# --- USO EN LA APP ---
+def cargar_capa_regional():
+    """Capa precalculada de la generación vigente del almacén o, si no, del repo."""
+    return _cargar_capa_regional(generacion_actual())
+
+@st.cache_data
+def _cargar_capa_regional(generacion):
+    datos = leer_activo(SALIDA_ACTIVO, generacion) if generacion else None
+    if datos is not None:
+        return json.load(io.BytesIO(datos))
+    if SALIDA_FILE.exists():
+        return json.loads(SALIDA_FILE.read_text(encoding="utf-8"))
+    return None
+
+def agregar_coropletas(mapa, capa, metrica, anio):
+    """Colorea cada región del mapa según la métrica y año elegidos."""
+    features = []
+    for feature in capa["features"]:
+        datos = feature["properties"]["valores"].get(anio, {})
+        features.append({
+            "type": "Feature",
+            "geometry": feature["geometry"],
+            "properties": {
+                "region": feature["properties"]["region"],
+                "valor": datos.get(metrica),
+                "sedes": datos.get("Sedes", 0),
+            },
+        })
+
+    valores = [f["properties"]["valor"] for f in features if f["properties"]["valor"] is not None]
+    if not valores:
+        return mapa
+    escala = cm.LinearColormap(
+        ["#deebf7", "#6baed6", "#08519c"],
+        vmin=min(valores),
+        vmax=max(valores) if max(valores) > min(valores) else min(valores) + 1,
+        caption=f"{metrica} {anio}"
+    )
+
+    def estilo(feature):
+        valor = feature["properties"]["valor"]
+        return {
+            "fillColor": escala(valor) if valor is not None else "#f0f0f0",
+            "color": "#7f8c8d",
+            "weight": 1,
+            "fillOpacity": 0.6,
+        }
+
+    folium.GeoJson(
+        {"type": "FeatureCollection", "features": features},
+        name="Regiones",
+        style_function=estilo,
+        tooltip=folium.GeoJsonTooltip(
+            fields=["region", "valor", "sedes"],
+            aliases=["Región", metrica, "Sedes"]
+        ),
+    ).add_to(mapa)
+    escala.add_to(mapa)
+    return mapa
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precalcula la capa regional del mapa.")
+    parser.add_argument("--admision", default=ADMISION_FILE)
+    parser.add_argument("--geometria", default=GEOMETRIA_FILE)
+    parser.add_argument("--campo-region", default="region")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA)
+    args = parser.parse_args()
+
+    try:
+        capa = precalcular(args.admision, args.geometria, args.campo_region, args.tolerancia)
+    except (FileNotFoundError, ValueError) as e:
+        sys.exit(f"Error: {e}")
+    print(
+        f"{SALIDA_FILE.name}: {len(capa['features'])} regiones, "
+        f"métricas {capa['metricas']}, años {capa['anios']}; "
+        f"generación publicada: {capa.get('generacion', '-')}"
+    )
@@ -0,0 +1,175 @@
+import streamlit as st
+import folium
+import pandas as pd
+from pathlib import Path
+import base64
+import io
+from almacen_activos import generacion_actual, leer_activo
+from capa_regional import SALIDA_ACTIVO as CAPA_REGIONAL_ACTIVO, SALIDA_FILE as CAPA_REGIONAL_FILE
+
+# --- CONFIGURACIÓN DE RUTAS ---
+BASE_PATH = Path(__file__).parent
+COOR_FILE = BASE_PATH / "Coordenadas_Sedes.xlsx"
+GRAFICOS_DIR = BASE_PATH / "graficos_sedes"
+NACIONAL_PATH = BASE_PATH / "Nacional.png"
+LOGO_PATH = BASE_PATH / "logo.png"  # Opcional: si tienes un logo
+COORDENADAS_ACTIVO = "Coordenadas_Sedes.parquet"  # nombre en el almacén compartido
+
+# Estas funciones viven en un módulo (y no en el script de la app) para que el
+# precalentamiento y la app compartan las mismas entradas de caché.
+
+# --- FUNCIONES AUXILIARES ---
+def nombre_activo(ruta):
+    """Nombre lógico de un archivo del repo dentro del almacén compartido."""
+    return ruta.relative_to(BASE_PATH).as_posix()
+
+def cargar_coordenadas():
+    """Carga las coordenadas de la generación vigente (cambia sola al publicar una nueva)."""
+    return _cargar_coordenadas(generacion_actual())
+
+@st.cache_data
+def _cargar_coordenadas(generacion):
+    """Carga el archivo de coordenadas y maneja errores."""
+    datos = leer_activo(COORDENADAS_ACTIVO, generacion) if generacion else None
+    if datos is not None:
+        return pd.read_parquet(io.BytesIO(datos))
+    try:
+        if not COOR_FILE.exists():
+            st.error(f"Archivo no encontrado: {COOR_FILE}")
+            return pd.DataFrame()
+        return pd.read_excel(COOR_FILE)
+    except Exception as e:
+        st.error(f"Error al cargar coordenadas: {str(e)}")
+        return pd.DataFrame()
+
+@st.cache_data
+def obtener_imagen_base64(ruta_imagen):
+    """Convierte una imagen a base64 para usarla en HTML."""
+    if ruta_imagen.exists():
+        with open(ruta_imagen, "rb") as img_file:
+            return base64.b64encode(img_file.read()).decode()
+    return ""
+
+def ruta_grafico(sede):
+    """Devuelve la ruta del PNG de una sede ('Nacional' incluida)."""
+    if sede == "Nacional":
+        return NACIONAL_PATH
+    return GRAFICOS_DIR / f"{sede}_graficos.png"
+
+def sede_desde_popup(texto, sedes):
+    """st_folium devuelve el texto visible del popup ('Peñalolén\n\nVer Gráficos'):
+    se toma la primera línea que sea una sede conocida, o None."""
+    conocidas = set(sedes)
+    for linea in str(texto).splitlines():
+        if linea.strip() in conocidas:
+            return linea.strip()
+    return None
+
+def leer_imagen(ruta):
+    """Bytes de una imagen: del almacén compartido si está publicada, si no del repo."""
+    datos = leer_activo(nombre_activo(ruta))
+    if datos is not None:
+        return datos
+    return _leer_archivo(ruta)
+
+@st.cache_resource
+def _leer_archivo(ruta):
+    """Lee (una vez por proceso) los bytes de una imagen; None si no existe."""
+    if not ruta.exists():
+        return None
+    return ruta.read_bytes()
+
+def construir_activos():
+    """Reúne los activos derivados a publicar en el almacén: {nombre: (bytes, extensión)}."""
+    activos = {}
+    for ruta in [NACIONAL_PATH, LOGO_PATH, *sorted(GRAFICOS_DIR.glob("*_graficos.png"))]:
+        if ruta.exists():
+            activos[nombre_activo(ruta)] = (ruta.read_bytes(), ruta.suffix)
+
+    # Las coordenadas se publican en Parquet: leerlas es mucho más barato que el Excel
+    df = pd.read_excel(COOR_FILE)
+    df['Latitud_sede'] = pd.to_numeric(df['Latitud_sede'], errors='coerce')
+    df['Longitud_sede'] = pd.to_numeric(df['Longitud_sede'], errors='coerce')
+    buffer = io.BytesIO()
+    df.to_parquet(buffer, index=False)
+    activos[COORDENADAS_ACTIVO] = (buffer.getvalue(), ".parquet")
+
+    # Capa regional precalculada (python capa_regional.py), si existe
+    if CAPA_REGIONAL_FILE.exists():
+        activos[CAPA_REGIONAL_ACTIVO] = (CAPA_REGIONAL_FILE.read_bytes(), ".geojson")
+    return activos
+
+# --- FUNCIONES DEL MAPA ---
+def crear_marcador(row, logo_base64, logo_url=None):
+    """Crea el marcador de Folium con el popup de una sede."""
+    # Con URL estable el logo lo cachea el navegador en vez de repetirse en cada popup
+    logo_src = logo_url or f"data:image/png;base64,{logo_base64}"
+
+    # HTML personalizado para el popup
+    logo_html = f"""
+    <div style="text-align:center;">
+        <img src="{logo_src}" width="80" style="margin-bottom:10px;">
+    </div>
+    """ if logo_url or logo_base64 else ""
+
+    popup_html = f"""
+    <div style="font-family: Arial, sans-serif; text-align: center; width: 200px;">
+        {logo_html}
+        <h4 style="margin-bottom: 10px; color: #2c3e50;">{row['NombreSede']}</h4>
+        <button style="
+            background-color: #3498db;
+            border: none;
+            color: white;
+            padding: 8px 16px;
+            text-align: center;
+            text-decoration: none;
+            display: inline-block;
+            font-size: 14px;
+            margin: 4px 2px;
+            cursor: pointer;
+            border-radius: 4px;
+            transition: background-color 0.3s;"
+            onmouseover="this.style.backgroundColor='#2980b9'"
+            onmouseout="this.style.backgroundColor='#3498db'"
+            onclick="window.parent.postMessage('{row['NombreSede']}', '*')">
+            Ver Gráficos
+        </button>
+    </div>
+    """
+
+    return folium.Marker(
+        location=[row['Latitud_sede'], row['Longitud_sede']],
+        popup=folium.Popup(popup_html, max_width=250),
+        tooltip=f"Click para {row['NombreSede']}",
+        icon=folium.Icon(color="blue", icon="university", prefix="fa")
+    )
+
+@st.cache_data
+def crear_mapa_interactivo(df, incluir_marcadores=True):
+    """Crea un mapa de Folium con marcadores para cada sede (cada llamada recibe una copia)."""
+    if df.empty:
+        return folium.Map(location=[-33.45, -70.67], zoom_start=5)
+
+    centro = [df['Latitud_sede'].mean(), df['Longitud_sede'].mean()]
+
+    # Configurar mapa base
+    mapa = folium.Map(
+        location=centro,
+        zoom_start=5,
+        tiles='CartoDB Positron',
+        control_scale=True,
+        attr='Mapa de Sedes'
+    )
+
+    # En modo por ventana los marcadores se envían aparte (ver capa_visible)
+    if not incluir_marcadores:
+        return mapa
+
+    # Cargar logo en base64 (si existe)
+    logo_base64 = obtener_imagen_base64(LOGO_PATH) if LOGO_PATH else ""
+
+    # Añadir marcadores
+    for _, row in df.dropna(subset=['Latitud_sede', 'Longitud_sede']).iterrows():
+        crear_marcador(row, logo_base64).add_to(mapa)
+
+    return mapa
@@ -0,0 +1,116 @@
+import math
+
+import folium
+import numpy as np
+import pandas as pd
+
+# --- PARÁMETROS DEL ÍNDICE ---
+TAMANO_CELDA = 0.5          # grados por celda de la grilla del índice
+UMBRAL_MARCADORES = 300     # sobre este número se envían clusters en vez de marcadores
+PIXELES_CLUSTER = 64        # tamaño aproximado (en px) de cada celda de cluster
+
+
+class IndiceEspacial:
+    """Índice en grilla sobre las coordenadas para consultar por ventana visible."""
+
+    def __init__(self, df, col_lat="Latitud_sede", col_lon="Longitud_sede", tamano_celda=TAMANO_CELDA):
+        self.col_lat = col_lat
+        self.col_lon = col_lon
+        self.tamano_celda = tamano_celda
+        self.df = df.dropna(subset=[col_lat, col_lon]).reset_index(drop=True)
+        self._lat = self.df[col_lat].to_numpy(dtype=float)
+        self._lon = self.df[col_lon].to_numpy(dtype=float)
+        celdas = pd.DataFrame({
+            "i": np.floor(self._lat / tamano_celda).astype(int),
+            "j": np.floor(self._lon / tamano_celda).astype(int),
+        })
+        self._celdas = celdas.groupby(["i", "j"]).indices if not celdas.empty else {}
+
+    def __len__(self):
+        return len(self.df)
+
+    def limites(self):
+        """Devuelve (sur, oeste, norte, este) de todos los puntos indexados."""
+        if self.df.empty:
+            return None
+        return (self._lat.min(), self._lon.min(), self._lat.max(), self._lon.max())
+
+    def consultar(self, limites):
+        """Devuelve las filas cuyos puntos caen dentro de (sur, oeste, norte, este)."""
+        if limites is None or self.df.empty:
+            return self.df
+        sur, oeste, norte, este = limites
+        i_min, i_max = math.floor(sur / self.tamano_celda), math.floor(norte / self.tamano_celda)
+        j_min, j_max = math.floor(oeste / self.tamano_celda), math.floor(este / self.tamano_celda)
+
+        # Si la ventana cubre más celdas de las que existen, recorremos las existentes
+        if (i_max - i_min + 1) * (j_max - j_min + 1) > len(self._celdas):
+            candidatas = [
+                pos for (i, j), pos in self._celdas.items()
+                if i_min <= i <= i_max and j_min <= j <= j_max
+            ]
+        else:
+            candidatas = [
+                self._celdas[(i, j)]
+                for i in range(i_min, i_max + 1)
+                for j in range(j_min, j_max + 1)
+                if (i, j) in self._celdas
+            ]
+        if not candidatas:
+            return self.df.iloc[0:0]
+
+        posiciones = np.concatenate(candidatas)
+        lat, lon = self._lat[posiciones], self._lon[posiciones]
+        dentro = (lat >= sur) & (lat <= norte) & (lon >= oeste) & (lon <= este)
+        return self.df.iloc[np.sort(posiciones[dentro])]
+
+    def agrupar(self, puntos, zoom):
+        """Agrega los puntos en clusters según el nivel de zoom (lat, lon, cantidad)."""
+        tamano = 360 / (2 ** zoom) * PIXELES_CLUSTER / 256
+        lat = puntos[self.col_lat].to_numpy(dtype=float)
+        lon = puntos[self.col_lon].to_numpy(dtype=float)
+        grupos = pd.DataFrame({
+            "i": np.floor(lat / tamano).astype(int),
+            "j": np.floor(lon / tamano).astype(int),
+            "lat": lat,
+            "lon": lon,
+        })
+        return (
+            grupos.groupby(["i", "j"])
+            .agg(lat=("lat", "mean"), lon=("lon", "mean"), cantidad=("lat", "size"))
+            .reset_index(drop=True)
+        )
+
+
+def limites_desde_evento(evento):
+    """Convierte los 'bounds' devueltos por st_folium en (sur, oeste, norte, este)."""
+    if not evento or not evento.get("bounds"):
+        return None
+    sw = evento["bounds"].get("_southWest") or {}
+    ne = evento["bounds"].get("_northEast") or {}
+    if None in (sw.get("lat"), sw.get("lng"), ne.get("lat"), ne.get("lng")):
+        return None
+    return (sw["lat"], sw["lng"], ne["lat"], ne["lng"])
+
+
+def capa_visible(indice, limites, zoom, crear_marcador, umbral=UMBRAL_MARCADORES):
+    """Crea un FeatureGroup solo con los marcadores (o clusters) de la ventana visible."""
+    capa = folium.FeatureGroup(name="Sedes")
+    visibles = indice.consultar(limites)
+
+    if len(visibles) <= umbral:
+        for _, row in visibles.iterrows():
+            crear_marcador(row).add_to(capa)
+        return capa
+
+    for grupo in indice.agrupar(visibles, zoom).itertuples():
+        folium.CircleMarker(
+            location=[grupo.lat, grupo.lon],
+            radius=min(8 + math.log2(grupo.cantidad) * 3, 30),
+            color="#2980b9",
+            fill=True,
+            fill_color="#3498db",
+            fill_opacity=0.7,
+            tooltip=f"{grupo.cantidad} puntos (acerca el mapa para ver el detalle)",
+        ).add_to(capa)
+    return capa
@@ -0,0 +1,174 @@
+"""Precalentamiento de cachés al iniciar el proceso y señal de "listo".
+
+La señal de listo es del proceso: un indicador en memoria, que servidor.py expone en
+GET /listo (200 listo, 503 precalentando), y, para el chequeo por comando, un archivo
+fuera del repo con el PID del proceso, que se borra al salir. Un archivo de un
+proceso muerto no cuenta como listo.
+
+Uso:
+    python precalentamiento.py [servidor.py] [opciones de streamlit]   # precalienta y lanza la app
+    python precalentamiento.py --listo                                  # health check (código 0 = listo)
+"""
+import atexit
+import os
+import sys
+import tempfile
+import time
+import threading
+import urllib.request
+from collections import Counter
+from pathlib import Path
+
+from almacen_activos import generacion_actual, publicar_generacion
+from datos_sedes import (
+    BASE_PATH,
+    LOGO_PATH,
+    cargar_coordenadas,
+    construir_activos,
+    crear_mapa_interactivo,
+    leer_imagen,
+    obtener_imagen_base64,
+    ruta_grafico,
+)
+
+# --- CONFIGURACIÓN ---
+ESTADISTICAS_FILE = Path(os.environ.get("ESTADISTICAS_ACCESO", BASE_PATH / "estadisticas_acceso.log"))
+SEDES_A_PRECARGAR = 10  # además de Nacional
+PUERTO = os.environ.get("STREAMLIT_SERVER_PORT", "8501")
+# Local a cada réplica (y a cada puerto), nunca en el checkout compartido
+LISTO_FILE = Path(os.environ.get("ARCHIVO_LISTO", Path(tempfile.gettempdir()) / f"sedes-listo-{PUERTO}"))
+
+_lock = threading.Lock()
+_listo = threading.Event()
+
+
+# --- ESTADÍSTICAS DE ACCESO ---
+def sedes_conocidas():
+    df = cargar_coordenadas()
+    sedes = set(df["NombreSede"]) if "NombreSede" in df else set()
+    return sedes | {"Nacional"}
+
+def registrar_acceso(sede):
+    """Agrega una línea por visita; el append es seguro entre sesiones y réplicas."""
+    if "\n" in str(sede) or sede not in sedes_conocidas():
+        return  # solo sedes conocidas: el log decide qué se precarga
+    try:
+        with _lock, open(ESTADISTICAS_FILE, "a", encoding="utf-8") as f:
+            f.write(f"{sede}\n")
+    except OSError:
+        pass  # las estadísticas nunca deben romper la app
+
+def sedes_mas_vistas(n=SEDES_A_PRECARGAR):
+    """Devuelve las sedes más vistas según las estadísticas, con Nacional siempre primero."""
+    conteo = Counter()
+    if ESTADISTICAS_FILE.exists():
+        with open(ESTADISTICAS_FILE, encoding="utf-8") as f:
+            conteo.update(linea.strip() for linea in f if linea.strip())
+    conocidas = sedes_conocidas()
+    conteo = Counter({sede: n for sede, n in conteo.items() if sede in conocidas})
+    conteo.pop("Nacional", None)
+    return ["Nacional"] + [sede for sede, _ in conteo.most_common(n)]
+
+
+# --- SEÑAL DE LISTO ---
+def esta_listo():
+    """True si este proceso ya terminó el precalentamiento."""
+    return _listo.is_set()
+
+def _pid_vivo(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def proceso_listo():
+    """Para el chequeo por comando: el archivo existe y su proceso sigue vivo."""
+    try:
+        pid = int(LISTO_FILE.read_text(encoding="utf-8").split("\n", 1)[0])
+    except (OSError, ValueError):
+        return False
+    return _pid_vivo(pid)
+
+def servidor_responde():
+    """Consulta el health check propio de Streamlit en este nodo."""
+    try:
+        with urllib.request.urlopen(f"http://localhost:{PUERTO}/_stcore/health", timeout=2) as r:
+            return r.status == 200
+    except OSError:
+        return False
+
+def marcar_listo(resumen=""):
+    _listo.set()
+    try:
+        LISTO_FILE.write_text(f"{os.getpid()}\n{resumen}", encoding="utf-8")
+        atexit.register(marcar_no_listo)
+    except OSError:
+        pass  # el indicador en memoria basta para la app y para GET /listo
+
+def marcar_no_listo():
+    _listo.clear()
+    try:
+        if LISTO_FILE.read_text(encoding="utf-8").split("\n", 1)[0] == str(os.getpid()):
+            LISTO_FILE.unlink()
+    except OSError:
+        pass
+
+
+# --- PRECALENTAMIENTO ---
+def precalentar(n_sedes=SEDES_A_PRECARGAR):
+    """Llena las cachés compartidas del proceso y marca la réplica como lista."""
+    marcar_no_listo()
+    inicio = time.perf_counter()
+
+    # Sin generación publicada no hay URLs estables (/activos): se publica una desde el repo.
+    # Para publicar cambios posteriores: python almacen_activos.py publicar
+    publicada = None
+    if generacion_actual() is None:
+        try:
+            publicada = publicar_generacion(construir_activos())
+            generacion_actual.clear()
+        except OSError as e:
+            print(f"No se pudo publicar en el almacén de activos: {e}")
+
+    df = cargar_coordenadas()
+    if not df.empty:
+        crear_mapa_interactivo(df)
+        crear_mapa_interactivo(df, incluir_marcadores=False)
+    obtener_imagen_base64(LOGO_PATH)
+
+    precargadas = []
+    for sede in sedes_mas_vistas(n_sedes):
+        if leer_imagen(ruta_grafico(sede)) is not None:
+            precargadas.append(sede)
+
+    resumen = (
+        f"Precalentamiento listo en {time.perf_counter() - inicio:.2f}s: "
+        f"{len(df)} coordenadas, imágenes: {', '.join(precargadas)}"
+        + (f", generación publicada: {publicada}" if publicada else "")
+    )
+    marcar_listo(resumen)
+    return resumen
+
+
+if __name__ == "__main__":
+    if "--listo" in sys.argv[1:]:
+        # Listo = precalentamiento terminado y servidor aceptando conexiones
+        sys.exit(0 if proceso_listo() and servidor_responde() else 1)
+
+    # El precalentamiento corre en este mismo proceso antes de levantar el servidor,
+    # así las cachés de st.cache_data / st.cache_resource ya están llenas para la app.
+    # Se usa el módulo importado (no __main__) para que la app vea la misma señal.
+    import precalentamiento
+
+    print(precalentamiento.precalentar())
+
+    from streamlit.web import cli as stcli
+
+    args = sys.argv[1:]
+    if not args or not args[0].endswith(".py"):
+        args = [str(BASE_PATH / "servidor.py")] + args
+    sys.argv = ["streamlit", "run"] + args
+    sys.exit(stcli.main())
@@ -0,0 +1,68 @@
+# --- COMUNA Y REGIÓN DE CADA SEDE ---
+# Coordenadas_Sedes.xlsx solo trae NombreSede y coordenadas, así que la comuna y la
+# región se mantienen a mano: al agregar una sede nueva hay que sumarla también aquí
+# para que la búsqueda la encuentre por comuna y región. (La capa regional ubica las
+# sedes por coordenadas y usa esta tabla solo si una sede cae fuera de los polígonos.)
+# Sedes sin ubicación física (p.ej. "Sede Virtual") no aparecen aquí.
+COMUNA_REGION = {
+    "Arica": ("Arica", "Arica y Parinacota"),
+    "Iquique": ("Iquique", "Tarapacá"),
+    "Antofagasta": ("Antofagasta", "Antofagasta"),
+    "Calama": ("Calama", "Antofagasta"),
+    "La Serena": ("La Serena", "Coquimbo"),
+    "Valparaíso": ("Valparaíso", "Valparaíso"),
+    "Viña Del Mar": ("Viña del Mar", "Valparaíso"),
+    "Reñaca": ("Viña del Mar", "Valparaíso"),
+    "Quilpué": ("Quilpué", "Valparaíso"),
+    "Quillota": ("Quillota", "Valparaíso"),
+    "Agustinas": ("Santiago", "Metropolitana"),
+    "Alameda": ("Santiago", "Metropolitana"),
+    "Brasil": ("Santiago", "Metropolitana"),
+    "Estación Central": ("Estación Central", "Metropolitana"),
+    "Providencia": ("Providencia", "Metropolitana"),
+    "Recoleta": ("Recoleta", "Metropolitana"),
+    "Apoquindo": ("Las Condes", "Metropolitana"),
+    "San Carlos de Apoquindo": ("Las Condes", "Metropolitana"),
+    "Vitacura": ("Vitacura", "Metropolitana"),
+    "La Dehesa": ("Lo Barnechea", "Metropolitana"),
+    "Chicureo": ("Colina", "Metropolitana"),
+    "Plaza Egaña": ("La Reina", "Metropolitana"),
+    "Peñalolén": ("Peñalolén", "Metropolitana"),
+    "La Florida": ("La Florida", "Metropolitana"),
+    "Puente Alto": ("Puente Alto", "Metropolitana"),
+    "San Miguel": ("San Miguel", "Metropolitana"),
+    "San Bernardo": ("San Bernardo", "Metropolitana"),
+    "Maipú": ("Maipú", "Metropolitana"),
+    "Melipilla": ("Melipilla", "Metropolitana"),
+    "Rancagua": ("Rancagua", "O'Higgins"),
+    "Curicó": ("Curicó", "Maule"),
+    "Talca": ("Talca", "Maule"),
+    "Chillán": ("Chillán", "Ñuble"),
+    "Concepción": ("Concepción", "Biobío"),
+    "San Pedro de la Paz": ("San Pedro de la Paz", "Biobío"),
+    "Los Ángeles": ("Los Ángeles", "Biobío"),
+    "Temuco": ("Temuco", "La Araucanía"),
+    "Valdivia": ("Valdivia", "Los Ríos"),
+    "Osorno": ("Osorno", "Los Lagos"),
+    "Puerto Montt": ("Puerto Montt", "Los Lagos"),
+}
+
+# --- REGIONES (de norte a sur): número romano y nombres alternativos ---
+REGIONES = {
+    "Arica y Parinacota": {"numero": "XV", "alias": ["Región de Arica y Parinacota"]},
+    "Tarapacá": {"numero": "I", "alias": ["Región de Tarapacá"]},
+    "Antofagasta": {"numero": "II", "alias": ["Región de Antofagasta"]},
+    "Atacama": {"numero": "III", "alias": ["Región de Atacama"]},
+    "Coquimbo": {"numero": "IV", "alias": ["Región de Coquimbo"]},
+    "Valparaíso": {"numero": "V", "alias": ["Región de Valparaíso"]},
+    "Metropolitana": {"numero": "XIII", "alias": ["RM", "Región Metropolitana", "Santiago"]},
+    "O'Higgins": {"numero": "VI", "alias": ["Libertador General Bernardo O'Higgins"]},
+    "Maule": {"numero": "VII", "alias": ["Región del Maule"]},
+    "Ñuble": {"numero": "XVI", "alias": ["Región de Ñuble"]},
+    "Biobío": {"numero": "VIII", "alias": ["Bío Bío", "Región del Biobío"]},
+    "La Araucanía": {"numero": "IX", "alias": ["Araucanía"]},
+    "Los Ríos": {"numero": "XIV", "alias": ["Región de Los Ríos"]},
+    "Los Lagos": {"numero": "X", "alias": ["Región de Los Lagos"]},
+    "Aysén": {"numero": "XI", "alias": ["Aysén del General Carlos Ibáñez del Campo"]},
+    "Magallanes": {"numero": "XII", "alias": ["Magallanes y de la Antártica Chilena"]},
+}
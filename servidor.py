@@ -0,0 +1,36 @@
+"""Punto de entrada: la app de Streamlit más las rutas /activos (caché HTTP) y /listo.
+
+Requiere Streamlit >= 1.57 (st.App). Con versiones anteriores este archivo se ejecuta
+como un script más y corre app.py tal cual, sin /activos ni /listo.
+
+Uso:
+    streamlit run servidor.py
+    python precalentamiento.py servidor.py [opciones de streamlit]
+"""
+import runpy
+import threading
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+import streamlit as st
+
+import activos_http
+from precalentamiento import esta_listo, precalentar
+
+
+@asynccontextmanager
+async def precalentar_al_iniciar(app):
+    """Sin precalentamiento.py se precalienta en segundo plano; mientras, /listo da 503."""
+    if not esta_listo():
+        threading.Thread(target=precalentar, daemon=True).start()
+    yield
+
+
+if hasattr(st, "App"):
+    # La app (app.py) corre en este mismo proceso y usa las URLs de /activos solo si
+    # las rutas están montadas.
+    activos_http.RUTAS_MONTADAS = True
+    app = st.App("app.py", routes=activos_http.rutas(), lifespan=precalentar_al_iniciar)
+else:
+    # Sin st.App, url_activo devuelve None y la app envía los bytes como antes
+    runpy.run_path(str(Path(__file__).with_name("app.py")), run_name="__main__")
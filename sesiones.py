@@ -0,0 +1,198 @@
+"""Contabilidad de memoria por sesión y liberación de medios de sesiones inactivas.
+
+Al liberar una sesión solo se sueltan los medios mostrados (imágenes); las descargas
+siguen registradas para que un clic en una pestaña que vuelve tras estar inactiva no
+termine en 404 (la app las genera bajo demanda, así que no retienen los bytes).
+
+Streamlit no expone una API pública para esto: se leen las estructuras del
+MediaFileManager del runtime. Si cambian en otra versión, las métricas quedan en
+cero y la política no hace nada, pero la app sigue funcionando.
+"""
+import os
+import pickle
+import sys
+import threading
+import time
+
+import pandas as pd
+import streamlit as st
+from streamlit.runtime import Runtime
+from streamlit.runtime.media_file_storage import MediaFileKind
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# --- POLÍTICA ---
+INACTIVIDAD_MAX = int(os.environ.get("SESION_INACTIVIDAD_MAX", 10 * 60))                # segundos
+MAX_BYTES_MEDIA = int(os.environ.get("SESION_MAX_BYTES_MEDIA", 300 * 1024 * 1024))      # total del proceso
+SEGUNDOS_ENTRE_REVISIONES = 30
+
+
+class RegistroSesiones:
+    """Actividad y tamaño de estado de cada sesión, compartido por todo el proceso."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sesiones = {}
+        self.ultima_revision = 0.0
+        self.liberadas_total = 0
+
+
+@st.cache_resource
+def registro():
+    return RegistroSesiones()
+
+
+# --- MEDICIÓN ---
+def _tamano(valor):
+    try:
+        return len(pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return sys.getsizeof(valor)
+
+def _gestor_media():
+    return Runtime.instance().media_file_mgr if Runtime.exists() else None
+
+def media_por_sesion():
+    """Devuelve ({sesión: set(file_id)}, {file_id: bytes}) según el gestor de medios."""
+    gestor = _gestor_media()
+    if gestor is None:
+        return {}, {}
+    try:
+        with gestor._lock:
+            por_sesion = {
+                sesion: set(archivos.values())
+                for sesion, archivos in gestor._files_by_session_and_coord.items()
+            }
+            almacen = getattr(gestor._storage, "_files_by_id", {})
+            tamanos = {fid: archivo.content_size for fid, archivo in almacen.items()}
+    except AttributeError:
+        return {}, {}
+    return por_sesion, tamanos
+
+def _medir_estado(info, ahora):
+    """Serializa session_state para estimar su tamaño (costoso: no en cada rerun)."""
+    info["bytes_estado"] = sum(_tamano(v) for v in st.session_state.to_dict().values())
+    info["medido"] = ahora
+
+def registrar_sesion():
+    """Anota la actividad de la sesión actual; devuelve True si sus medios fueron liberados."""
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return False
+    reg = registro()
+    ahora = time.time()
+    with reg.lock:
+        info = reg.sesiones.setdefault(ctx.session_id, {"inicio": ahora, "liberada": False})
+        info["ultima_actividad"] = ahora
+        liberada, info["liberada"] = info["liberada"], False
+    # Mover el mapa provoca reruns: el tamaño del estado se mide como mucho una vez por revisión
+    if ahora - info.get("medido", 0) >= SEGUNDOS_ENTRE_REVISIONES:
+        _medir_estado(info, ahora)
+    return liberada
+
+def resumen():
+    """Una fila por sesión activa: edad, inactividad, medios retenidos y tamaño del estado."""
+    reg = registro()
+    por_sesion, tamanos = media_por_sesion()
+    ahora = time.time()
+    filas = []
+    with reg.lock:
+        for sesion, info in reg.sesiones.items():
+            archivos = por_sesion.get(sesion, set())
+            filas.append({
+                "sesión": sesion[:8],
+                "edad (min)": round((ahora - info["inicio"]) / 60, 1),
+                "inactiva (min)": round((ahora - info["ultima_actividad"]) / 60, 1),
+                "archivos media": len(archivos),
+                "MB media": round(sum(tamanos.get(f, 0) for f in archivos) / 1e6, 2),
+                "KB estado": round(info.get("bytes_estado", 0) / 1e3, 1),
+            })
+    return pd.DataFrame(filas)
+
+
+# --- POLÍTICA DE LIBERACIÓN ---
+def _liberar(gestor, reg, sesion):
+    """Suelta los medios mostrados de la sesión; devuelve los file_id que conserva."""
+    with gestor._lock:
+        archivos = gestor._files_by_session_and_coord.get(sesion, {})
+        for coord, fid in list(archivos.items()):
+            metadatos = gestor._file_metadata.get(fid)
+            if metadatos is not None and metadatos.kind == MediaFileKind.MEDIA:
+                del archivos[coord]
+        conservados = set(archivos.values())
+    reg.sesiones[sesion]["liberada"] = True
+    reg.liberadas_total += 1
+    return conservados
+
+def aplicar_politica(forzar=False):
+    """Libera los medios de sesiones inactivas y, si el total supera el tope, los de las
+    sesiones menos recientes. Se ejecuta como mucho cada SEGUNDOS_ENTRE_REVISIONES."""
+    reg = registro()
+    gestor = _gestor_media()
+    ahora = time.time()
+    if gestor is None or (not forzar and ahora - reg.ultima_revision < SEGUNDOS_ENTRE_REVISIONES):
+        return 0
+    reg.ultima_revision = ahora
+
+    ctx = get_script_run_ctx()
+    actual = ctx.session_id if ctx else None
+    por_sesion, tamanos = media_por_sesion()
+    runtime = Runtime.instance()
+    liberadas = 0
+
+    with reg.lock:
+        # Olvidar sesiones cerradas
+        for sesion in [s for s in reg.sesiones if not runtime.is_active_session(s)]:
+            del reg.sesiones[sesion]
+
+        # 1) Sesiones inactivas: se sueltan sus medios
+        candidatas = sorted(
+            (info["ultima_actividad"], sesion)
+            for sesion, info in reg.sesiones.items()
+            if sesion != actual and por_sesion.get(sesion) and not info["liberada"]
+        )
+        for ultima, sesion in candidatas:
+            if ahora - ultima > INACTIVIDAD_MAX:
+                por_sesion[sesion] = _liberar(gestor, reg, sesion)
+                liberadas += 1
+
+        # 2) Tope total: se liberan las menos recientes hasta quedar bajo el límite
+        def total():
+            en_uso = set().union(*por_sesion.values()) if por_sesion else set()
+            return sum(tamanos.get(f, 0) for f in en_uso)
+
+        for _, sesion in candidatas:
+            if total() <= MAX_BYTES_MEDIA:
+                break
+            if not reg.sesiones[sesion]["liberada"]:  # no liberada ya en el paso 1
+                por_sesion[sesion] = _liberar(gestor, reg, sesion)
+                liberadas += 1
+
+    if liberadas:
+        gestor.remove_orphaned_files()
+    return liberadas
+
+
+# --- VISTA DE ADMINISTRACIÓN ---
+def mostrar_panel_admin():
+    """Totales de memoria por sesión y controles de la política."""
+    st.header("🛠️ Memoria por sesión")
+    st.caption("El tamaño del estado se mide como mucho cada "
+               f"{SEGUNDOS_ENTRE_REVISIONES} s por sesión.")
+    if st.button("Aplicar política ahora"):
+        st.success(f"Sesiones liberadas: {aplicar_politica(forzar=True)}")
+
+    df = resumen()
+    por_sesion, tamanos = media_por_sesion()
+    en_uso = set().union(*por_sesion.values()) if por_sesion else set()
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Sesiones", len(df))
+    col2.metric("MB media en uso", round(sum(tamanos.get(f, 0) for f in en_uso) / 1e6, 1))
+    col3.metric("MB media almacenados", round(sum(tamanos.values()) / 1e6, 1))
+    col4.metric("Liberaciones", registro().liberadas_total)
+    st.caption(
+        f"Política: liberar tras {INACTIVIDAD_MAX // 60} min de inactividad; "
+        f"tope de media {MAX_BYTES_MEDIA / 1e6:.0f} MB."
+    )
+    if not df.empty:
+        st.dataframe(df.sort_values("MB media", ascending=False), use_container_width=True)